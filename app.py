@@ -3,13 +3,14 @@ Dashboard E-commerce Analytics
 Application Streamlit pour visualiser les données de ventes
 """
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import sys
 sys.path.append('src')
-from analysis import *
+from analysis import (
+    load_data, filter_completed, apply_filters, build_cube, calculate_kpis,
+    sales_by_category, sales_by_region, sales_over_time, downsample_lttb,
+    cap_slices, top_products, customer_segments_analysis, payment_method_analysis
+)
 
 # Configuration de la page
 st.set_page_config(
@@ -50,13 +51,68 @@ def load_all_data():
     transactions, customers = load_data()
     return transactions, customers
 
+@st.cache_resource(show_spinner=False)
+def load_cube():
+    """Cube d'agrégats des transactions complétées, construit une seule fois"""
+    transactions, _ = load_all_data()
+    return build_cube(filter_completed(transactions))
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def filtered_view(start_date, end_date, category, region):
+    """
+    Transactions filtrées, transactions complétées et cube filtré pour un
+    jeu de filtres donné
+
+    Mis en cache par ressource : les DataFrames sont partagés entre les
+    reruns sans copie et ne doivent pas être modifiés.
+    """
+    transactions, _ = load_all_data()
+    filtered_df = apply_filters(transactions, start_date, end_date, category, region)
+    cube = apply_filters(load_cube(), start_date, end_date, category, region)
+
+    # Transactions complétées, filtrées une seule fois (KPIs et top produits)
+    return filtered_df, filter_completed(filtered_df), cube
+
+# Analyses mises en cache par filtres (start_date, end_date, category, region)
+@st.cache_data(show_spinner=False)
+def cached_analyses(filters):
+    """
+    KPIs et agrégats ne dépendant que des filtres, calculés en parallèle
+
+    Les groupby pandas relâchent en partie le GIL : les quatre réductions
+    s'exécutent dans un pool de threads.
+    """
+    filtered_df, completed_df, cube = filtered_view(*filters)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {
+            'kpis': executor.submit(calculate_kpis, filtered_df, completed_df),
+            'category': executor.submit(sales_by_category, cube),
+            'region': executor.submit(sales_by_region, cube),
+            'payment': executor.submit(payment_method_analysis, cube),
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+@st.cache_data(show_spinner=False)
+def cached_sales_over_time(filters, freq):
+    return sales_over_time(filtered_view(*filters)[2], freq=freq)
+
+@st.cache_data(show_spinner=False)
+def cached_top_products(filters, n):
+    return top_products(filtered_view(*filters)[1], n=n)
+
+@st.cache_data(show_spinner=False)
+def cached_customer_segments_analysis():
+    _, customers = load_all_data()
+    return customer_segments_analysis(customers)
+
 def main():
     # Header
     st.markdown('<h1 class="main-header">📊 E-commerce Analytics Dashboard</h1>', unsafe_allow_html=True)
 
     # Chargement des données
     try:
-        transactions, customers = load_all_data()
+        transactions, _ = load_all_data()
     except FileNotFoundError:
         st.error("❌ Fichiers de données introuvables. Veuillez exécuter 'python src/generate_data.py' d'abord.")
         return
@@ -83,26 +139,19 @@ def main():
     regions = ['Toutes'] + sorted(transactions['region'].unique().tolist())
     selected_region = st.sidebar.selectbox("Région", regions)
 
-    # Filtrage des données
-    filtered_df = transactions.copy()
-
+    # Clé de cache des analyses
     if len(date_range) == 2:
         start_date, end_date = date_range
-        filtered_df = filtered_df[
-            (filtered_df['date'] >= pd.Timestamp(start_date)) &
-            (filtered_df['date'] <= pd.Timestamp(end_date))
-        ]
+    else:
+        start_date = end_date = None
 
-    if selected_category != 'Toutes':
-        filtered_df = filtered_df[filtered_df['category'] == selected_category]
-
-    if selected_region != 'Toutes':
-        filtered_df = filtered_df[filtered_df['region'] == selected_region]
+    filters = (start_date, end_date, selected_category, selected_region)
 
     # KPIs principaux
     st.header("📈 KPIs Principaux")
 
-    kpis = calculate_kpis(filtered_df)
+    analyses = cached_analyses(filters)
+    kpis = analyses['kpis']
 
     col1, col2, col3, col4 = st.columns(4)
 
@@ -153,6 +202,11 @@ def main():
     # Séparateur
     st.markdown("---")
 
+    # Plotly importé après les KPIs (import coûteux) : les métriques
+    # s'affichent avant le chargement du module
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     # Graphiques - Ligne 1
     st.header("📊 Analyses des Ventes")
 
@@ -160,10 +214,10 @@ def main():
 
     with col1:
         st.subheader("Ventes par Catégorie")
-        cat_data = sales_by_category(filtered_df)
+        cat_data = analyses['category']
 
         fig_cat = px.pie(
-            cat_data,
+            cap_slices(cat_data, 'category'),
             values='revenue',
             names='category',
             title='Répartition du CA par Catégorie',
@@ -185,7 +239,7 @@ def main():
 
     with col2:
         st.subheader("Ventes par Région")
-        region_data = sales_by_region(filtered_df)
+        region_data = analyses['region']
 
         fig_region = px.bar(
             region_data,
@@ -225,11 +279,13 @@ def main():
         )
 
         freq_map = {'Jour': 'D', 'Semaine': 'W', 'Mois': 'M'}
-        time_data = sales_over_time(filtered_df, freq=freq_map[time_freq])
+        time_data = cached_sales_over_time(filters, freq_map[time_freq])
+        # Au plus 2000 points envoyés au navigateur, quelle que soit la période
+        time_data = downsample_lttb(time_data, 'date', 'revenue', n_out=2000)
 
         fig_time = go.Figure()
 
-        fig_time.add_trace(go.Scatter(
+        fig_time.add_trace(go.Scattergl(
             x=time_data['date'],
             y=time_data['revenue'],
             mode='lines+markers',
@@ -250,7 +306,7 @@ def main():
 
     with col2:
         st.subheader("Moyens de Paiement")
-        payment_data = payment_method_analysis(filtered_df)
+        payment_data = analyses['payment']
 
         fig_payment = px.bar(
             payment_data,
@@ -276,7 +332,7 @@ def main():
     st.header("🏆 Top Produits")
 
     n_products = st.slider("Nombre de produits à afficher", 5, 20, 10)
-    top_prod = top_products(filtered_df, n=n_products)
+    top_prod = cached_top_products(filters, n_products)
 
     fig_products = px.bar(
         top_prod,
@@ -309,7 +365,7 @@ def main():
 
     with col1:
         st.subheader("Segments Clients")
-        segment_data = customer_segments_analysis(customers)
+        segment_data = cached_customer_segments_analysis()
 
         st.dataframe(
             segment_data.style.format({
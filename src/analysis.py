@@ -5,14 +5,171 @@ Contient les fonctions de calcul des KPIs et statistiques
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from pathlib import Path
+
+# Colonnes à faible cardinalité stockées en dtype 'category'.
+# Les agrégats les repassent en str : Plotly Express échoue sur les
+# catégories déclarées mais absentes des données filtrées.
+TRANSACTION_DTYPES = {
+    'customer_id': 'category',
+    'category': 'category',
+    'product': 'category',
+    'region': 'category',
+    'payment_method': 'category',
+    'status': 'category',
+    # Colonnes numériques réduites (moitié moins de mémoire à parcourir).
+    # total_amount reste en float64 : en float32 les sommes de CA au-delà
+    # du million perdent les centimes.
+    'quantity': 'int16',
+    'unit_price': 'float32',
+}
+CUSTOMER_DTYPES = {
+    'customer_id': 'category',
+    'segment': 'category',
+}
+
+def read_table(name, parse_dates, dtype):
+    """
+    Charge une table depuis data/, en Parquet si disponible et à jour sinon en CSV
+
+    Parameters:
+    -----------
+    name : str
+        Nom du fichier sans extension ('transactions', 'customers')
+    parse_dates : list
+        Colonnes de dates à parser (CSV uniquement)
+    dtype : dict
+        Types des colonnes
+
+    Returns:
+    --------
+    pd.DataFrame
+        Table chargée
+    """
+    parquet_path = Path('data') / f'{name}.parquet'
+    csv_path = Path('data') / f'{name}.csv'
+
+    # Le Parquet n'est utilisé que s'il est au moins aussi récent que le CSV
+    # (un CSV mis à jour ou modifié depuis la génération reste prioritaire)
+    if parquet_path.exists() and (
+        not csv_path.exists()
+        or parquet_path.stat().st_mtime >= csv_path.stat().st_mtime
+    ):
+        # Dates et types sont conservés par le format Parquet
+        return pd.read_parquet(parquet_path).astype(dtype)
+
+    # Parseur CSV multi-thread pyarrow
+    return pd.read_csv(csv_path, engine='pyarrow',
+                       parse_dates=parse_dates, dtype=dtype)
+
+# Dimensions du cube d'agrégats (voir build_cube)
+CUBE_KEYS = ['date', 'category', 'region', 'payment_method']
 
 def load_data():
-    """Charge les données depuis les fichiers CSV"""
-    transactions = pd.read_csv('data/transactions.csv', parse_dates=['date'])
-    customers = pd.read_csv('data/customers.csv', parse_dates=['first_purchase_date'])
+    """Charge les données depuis les fichiers Parquet (ou CSV à défaut)"""
+    transactions = read_table('transactions', ['date'], TRANSACTION_DTYPES)
+    # Tri par date : permet le filtrage par période en O(log N) (filter_date_range)
+    transactions = transactions.sort_values('date', kind='stable').reset_index(drop=True)
+    customers = read_table('customers', ['first_purchase_date'], CUSTOMER_DTYPES)
     return transactions, customers
 
-def calculate_kpis(df):
+def filter_date_range(df, start_date, end_date):
+    """
+    Sélectionne les transactions d'une période (bornes incluses)
+
+    Les transactions doivent être triées par date (voir load_data) : les
+    bornes sont trouvées par recherche dichotomique et le résultat est une
+    tranche de df, sans masque booléen.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        DataFrame des transactions, trié par date
+    start_date, end_date : date
+        Premier et dernier jour de la période
+
+    Returns:
+    --------
+    pd.DataFrame
+        Transactions de la période
+    """
+    bounds = np.array([pd.Timestamp(start_date),
+                       pd.Timestamp(end_date) + pd.Timedelta(days=1)],
+                      dtype='datetime64[ns]')
+    lo, hi = np.searchsorted(df['date'].to_numpy(), bounds)
+    return df.iloc[lo:hi]
+
+def filter_completed(df):
+    """
+    Filtre les transactions complétées
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        DataFrame des transactions
+
+    Returns:
+    --------
+    pd.DataFrame
+        Transactions au statut 'Complété'
+    """
+    return df[df['status'] == 'Complété']
+
+def apply_filters(df, start_date=None, end_date=None, category='Toutes', region='Toutes'):
+    """
+    Applique les filtres du dashboard (période, catégorie, région)
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Transactions ou cube d'agrégats, trié par date
+    start_date, end_date : date ou None
+        Période (bornes incluses), None pour ne pas filtrer
+    category, region : str
+        Modalité retenue, 'Toutes' pour ne pas filtrer
+
+    Returns:
+    --------
+    pd.DataFrame
+        Lignes correspondant aux filtres
+    """
+    if start_date is not None:
+        df = filter_date_range(df, start_date, end_date)
+
+    if category != 'Toutes':
+        df = df[df['category'] == category]
+
+    if region != 'Toutes':
+        df = df[df['region'] == region]
+
+    return df
+
+def build_cube(completed_df):
+    """
+    Pré-agrège les transactions complétées par jour, catégorie, région et
+    moyen de paiement
+
+    Les analyses par catégorie, région, moyen de paiement et période
+    travaillent sur ce cube (une ligne par combinaison présente) plutôt que
+    sur les transactions elles-mêmes.
+
+    Parameters:
+    -----------
+    completed_df : pd.DataFrame
+        Transactions complétées (voir filter_completed)
+
+    Returns:
+    --------
+    pd.DataFrame
+        Cube trié par date : clés + 'revenue', 'transactions', 'units_sold'
+    """
+    return completed_df.groupby(CUBE_KEYS, observed=True).agg(
+        revenue=('total_amount', 'sum'),
+        transactions=('transaction_id', 'count'),
+        units_sold=('quantity', 'sum')
+    ).reset_index()
+
+def calculate_kpis(df, completed):
     """
     Calcule les KPIs principaux
 
@@ -20,15 +177,14 @@ def calculate_kpis(df):
     -----------
     df : pd.DataFrame
         DataFrame des transactions
+    completed : pd.DataFrame
+        Transactions complétées (voir filter_completed)
 
     Returns:
     --------
     dict
         Dictionnaire contenant les KPIs
     """
-    # Filtrer seulement les transactions complétées
-    completed = df[df['status'] == 'Complété']
-
     kpis = {
         'total_revenue': completed['total_amount'].sum(),
         'total_transactions': len(completed),
@@ -42,67 +198,93 @@ def calculate_kpis(df):
 
     return kpis
 
-def sales_by_category(df):
+def sales_by_category(cube):
     """
     Analyse des ventes par catégorie
 
     Parameters:
     -----------
-    df : pd.DataFrame
-        DataFrame des transactions
+    cube : pd.DataFrame
+        Cube d'agrégats (voir build_cube)
 
     Returns:
     --------
     pd.DataFrame
         Ventes par catégorie
     """
-    completed = df[df['status'] == 'Complété']
-
-    category_stats = completed.groupby('category').agg({
-        'total_amount': 'sum',
-        'transaction_id': 'count',
-        'quantity': 'sum'
+    category_stats = cube.groupby('category', observed=True, sort=False).agg({
+        'revenue': 'sum',
+        'transactions': 'sum',
+        'units_sold': 'sum'
     }).reset_index()
 
-    category_stats.columns = ['category', 'revenue', 'transactions', 'units_sold']
+    category_stats = category_stats.astype({'category': str})
     category_stats = category_stats.sort_values('revenue', ascending=False)
 
     return category_stats
 
-def sales_by_region(df):
+def revenue_by_key(cube, key):
     """
-    Analyse des ventes par région
+    CA et nombre de transactions par modalité d'une colonne catégorielle
+
+    Agrégation directe sur les codes de la catégorie avec np.bincount,
+    plus rapide qu'un groupby pour une clé unique de faible cardinalité.
 
     Parameters:
     -----------
-    df : pd.DataFrame
-        DataFrame des transactions
+    cube : pd.DataFrame
+        Cube d'agrégats (voir build_cube)
+    key : str
+        Colonne de dtype 'category'
 
     Returns:
     --------
     pd.DataFrame
-        Ventes par région
+        Colonnes [key, 'revenue', 'transactions'], modalités présentes uniquement
+    """
+    column = cube[key]
+    n_categories = len(column.cat.categories)
+    codes = column.cat.codes.to_numpy()
+    valid = codes >= 0  # -1 = valeur manquante
+    revenue = cube['revenue'].to_numpy()[valid]
+    transactions = cube['transactions'].to_numpy()[valid]
+
+    stats = pd.DataFrame({
+        key: column.cat.categories.astype(str),
+        'revenue': np.bincount(codes[valid], weights=revenue, minlength=n_categories),
+        'transactions': np.bincount(codes[valid], weights=transactions,
+                                    minlength=n_categories).astype('int64')
+    })
+
+    return stats[stats['transactions'] > 0]
+
+def sales_by_region(cube):
     """
-    completed = df[df['status'] == 'Complété']
+    Analyse des ventes par région
 
-    region_stats = completed.groupby('region').agg({
-        'total_amount': 'sum',
-        'transaction_id': 'count'
-    }).reset_index()
+    Parameters:
+    -----------
+    cube : pd.DataFrame
+        Cube d'agrégats (voir build_cube)
 
-    region_stats.columns = ['region', 'revenue', 'transactions']
+    Returns:
+    --------
+    pd.DataFrame
+        Ventes par région
+    """
+    region_stats = revenue_by_key(cube, 'region')
     region_stats = region_stats.sort_values('revenue', ascending=False)
 
     return region_stats
 
-def sales_over_time(df, freq='M'):
+def sales_over_time(cube, freq='M'):
     """
     Évolution des ventes dans le temps
 
     Parameters:
     -----------
-    df : pd.DataFrame
-        DataFrame des transactions
+    cube : pd.DataFrame
+        Cube d'agrégats (voir build_cube)
     freq : str
         Fréquence d'agrégation ('D', 'W', 'M', 'Y')
 
@@ -111,26 +293,105 @@ def sales_over_time(df, freq='M'):
     pd.DataFrame
         Ventes par période
     """
-    completed = df[df['status'] == 'Complété'].copy()
-    completed['date'] = pd.to_datetime(completed['date'])
-
-    time_series = completed.groupby(pd.Grouper(key='date', freq=freq)).agg({
-        'total_amount': 'sum',
-        'transaction_id': 'count'
+    time_series = cube.groupby(pd.Grouper(key='date', freq=freq)).agg({
+        'revenue': 'sum',
+        'transactions': 'sum'
     }).reset_index()
 
-    time_series.columns = ['date', 'revenue', 'transactions']
-
     return time_series
 
-def top_products(df, n=10):
+def downsample_lttb(df, x, y, n_out=2000):
     """
-    Produits les plus vendus
+    Sous-échantillonne une série temporelle (Largest-Triangle-Three-Buckets)
+
+    Conserve la forme visuelle de la courbe en gardant, dans chaque tranche,
+    le point qui forme le plus grand triangle avec ses voisins.
 
     Parameters:
     -----------
     df : pd.DataFrame
-        DataFrame des transactions
+        Série triée selon x
+    x : str
+        Colonne des abscisses (dates ou numérique)
+    y : str
+        Colonne des valeurs
+    n_out : int
+        Nombre maximal de points conservés
+
+    Returns:
+    --------
+    pd.DataFrame
+        Sous-ensemble des lignes de df (au plus n_out)
+    """
+    n = len(df)
+    if n <= n_out or n_out < 3:
+        return df
+
+    x_values = df[x].to_numpy()
+    if x_values.dtype.kind == 'M':
+        x_values = x_values.astype('int64')
+    x_values = x_values.astype('float64')
+    y_values = df[y].to_numpy(dtype='float64')
+
+    # Premier et dernier points toujours conservés, n_out - 2 tranches entre les deux
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Moyenne de la tranche suivante (ou dernier point)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x_values[next_start:next_end].mean()
+        avg_y = y_values[next_start:next_end].mean()
+
+        prev = selected[i]
+        areas = np.abs(
+            (x_values[prev] - avg_x) * (y_values[start:end] - y_values[prev])
+            - (x_values[prev] - x_values[start:end]) * (avg_y - y_values[prev])
+        )
+        selected[i + 1] = start + np.argmax(areas)
+
+    return df.iloc[selected]
+
+def cap_slices(stats, label, max_slices=25, other_label='Autres'):
+    """
+    Limite le nombre de parts d'un camembert en regroupant la queue
+
+    Parameters:
+    -----------
+    stats : pd.DataFrame
+        Agrégat trié par valeur décroissante
+    label : str
+        Colonne des libellés
+    max_slices : int
+        Nombre maximal de parts (dont la part 'Autres')
+    other_label : str
+        Libellé de la part regroupant la queue
+
+    Returns:
+    --------
+    pd.DataFrame
+        Agrégat d'au plus max_slices lignes
+    """
+    if len(stats) <= max_slices:
+        return stats
+
+    other = stats.iloc[max_slices - 1:].sum(numeric_only=True).to_frame().T
+    other[label] = other_label
+
+    capped = pd.concat([stats.iloc[:max_slices - 1], other], ignore_index=True)
+    return capped.astype(stats.dtypes.to_dict())
+
+def top_products(completed_df, n=10):
+    """
+    Produits les plus vendus
+
+    Parameters:
+    -----------
+    completed_df : pd.DataFrame
+        Transactions complétées (voir filter_completed)
     n : int
         Nombre de produits à retourner
 
@@ -139,16 +400,15 @@ def top_products(df, n=10):
     pd.DataFrame
         Top produits
     """
-    completed = df[df['status'] == 'Complété']
-
-    product_stats = completed.groupby(['product', 'category']).agg({
+    product_stats = completed_df.groupby(['product', 'category'], observed=True, sort=False).agg({
         'total_amount': 'sum',
         'quantity': 'sum',
         'transaction_id': 'count'
     }).reset_index()
 
     product_stats.columns = ['product', 'category', 'revenue', 'units_sold', 'orders']
-    product_stats = product_stats.sort_values('revenue', ascending=False).head(n)
+    product_stats = product_stats.astype({'product': str, 'category': str})
+    product_stats = product_stats.nlargest(n, 'revenue')
 
     return product_stats
 
@@ -166,38 +426,32 @@ def customer_segments_analysis(customers_df):
     pd.DataFrame
         Statistiques par segment
     """
-    segment_stats = customers_df.groupby('segment').agg({
-        'customer_id': 'count',
-        'total_spent': ['sum', 'mean'],
-        'total_purchases': 'mean'
-    }).reset_index()
+    segment_stats = customers_df.groupby('segment', observed=True).agg(
+        nb_customers=('customer_id', 'count'),
+        total_revenue=('total_spent', 'sum'),
+        avg_spent=('total_spent', 'mean'),
+        avg_purchases=('total_purchases', 'mean')
+    ).reset_index()
 
-    segment_stats.columns = ['segment', 'nb_customers', 'total_revenue', 'avg_spent', 'avg_purchases']
+    segment_stats = segment_stats.astype({'segment': str})
 
     return segment_stats
 
-def payment_method_analysis(df):
+def payment_method_analysis(cube):
     """
     Analyse des moyens de paiement
 
     Parameters:
     -----------
-    df : pd.DataFrame
-        DataFrame des transactions
+    cube : pd.DataFrame
+        Cube d'agrégats (voir build_cube)
 
     Returns:
     --------
     pd.DataFrame
         Statistiques par moyen de paiement
     """
-    completed = df[df['status'] == 'Complété']
-
-    payment_stats = completed.groupby('payment_method').agg({
-        'total_amount': 'sum',
-        'transaction_id': 'count'
-    }).reset_index()
-
-    payment_stats.columns = ['payment_method', 'revenue', 'transactions']
+    payment_stats = revenue_by_key(cube, 'payment_method')
     payment_stats['percentage'] = (payment_stats['transactions'] / payment_stats['transactions'].sum()) * 100
     payment_stats = payment_stats.sort_values('revenue', ascending=False)
 
@@ -209,7 +463,8 @@ if __name__ == "__main__":
     transactions, customers = load_data()
 
     print("\n=== KPIs PRINCIPAUX ===")
-    kpis = calculate_kpis(transactions)
+    completed = filter_completed(transactions)
+    kpis = calculate_kpis(transactions, completed)
     for key, value in kpis.items():
         if 'rate' in key or 'percentage' in key:
             print(f"{key}: {value:.2f}%")
@@ -219,10 +474,11 @@ if __name__ == "__main__":
             print(f"{key}: {value:,}")
 
     print("\n=== VENTES PAR CATEGORIE ===")
-    print(sales_by_category(transactions))
+    cube = build_cube(completed)
+    print(sales_by_category(cube))
 
     print("\n=== TOP 5 PRODUITS ===")
-    print(top_products(transactions, n=5))
+    print(top_products(completed, n=5))
 
     print("\n=== SEGMENTS CLIENTS ===")
     print(customer_segments_analysis(customers))
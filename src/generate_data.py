@@ -4,11 +4,9 @@ Génère des données e-commerce réalistes pour l'analyse
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import random
 
 # Configuration
-np.random.seed(42)
-random.seed(42)
+SEED = 42
 
 # Listes de produits réalistes
 CATEGORIES = ['Électronique', 'Vêtements', 'Maison & Jardin', 'Sports & Loisirs', 'Livres']
@@ -20,6 +18,9 @@ PRODUCTS = {
     'Livres': ['Roman', 'BD', 'Guide pratique', 'Biographie', 'Science-fiction', 'Cuisine']
 }
 
+# Fourchette de prix (min, max) par catégorie, dans l'ordre de CATEGORIES
+PRICE_RANGES = np.array([[50, 1200], [15, 150], [10, 300], [10, 500], [5, 50]])
+
 REGIONS = ['Île-de-France', 'Auvergne-Rhône-Alpes', 'Provence-Alpes-Côte d\'Azur',
            'Nouvelle-Aquitaine', 'Occitanie', 'Hauts-de-France', 'Bretagne', 'Grand Est']
 
@@ -39,68 +40,54 @@ def generate_ecommerce_data(n_transactions=5000):
     pd.DataFrame
         DataFrame avec les transactions
     """
-    data = []
+    rng = np.random.default_rng(SEED)
+    n = n_transactions
 
     # Date de début : il y a 2 ans
     start_date = datetime.now() - timedelta(days=730)
 
-    for i in range(n_transactions):
-        # Génération de la date (plus de ventes récentes)
-        days_offset = int(np.random.exponential(200))
-        if days_offset > 730:
-            days_offset = random.randint(0, 730)
-        transaction_date = start_date + timedelta(days=days_offset)
-
-        # Catégorie et produit
-        category = random.choice(CATEGORIES)
-        product = random.choice(PRODUCTS[category])
-
-        # Prix basé sur la catégorie
-        if category == 'Électronique':
-            base_price = random.uniform(50, 1200)
-        elif category == 'Vêtements':
-            base_price = random.uniform(15, 150)
-        elif category == 'Maison & Jardin':
-            base_price = random.uniform(10, 300)
-        elif category == 'Sports & Loisirs':
-            base_price = random.uniform(10, 500)
-        else:  # Livres
-            base_price = random.uniform(5, 50)
-
-        # Quantité (plus souvent 1-2)
-        quantity = np.random.choice([1, 2, 3, 4, 5], p=[0.5, 0.25, 0.15, 0.07, 0.03])
-
-        # Prix total avec petite variation aléatoire
-        price = round(base_price * random.uniform(0.9, 1.1), 2)
-        total = round(price * quantity, 2)
-
-        # Client ID (environ 1000 clients différents)
-        customer_id = f"CUST_{random.randint(1, 1000):04d}"
-
-        # Région
-        region = random.choice(REGIONS)
-
-        # Moyen de paiement
-        payment = random.choice(PAYMENT_METHODS)
-
-        # Statut (95% de succès)
-        status = np.random.choice(['Complété', 'Annulé', 'Remboursé'],
-                                   p=[0.95, 0.03, 0.02])
-
-        # Ajouter la transaction
-        data.append({
-            'transaction_id': f"TXN_{i+1:06d}",
-            'date': transaction_date.strftime('%Y-%m-%d'),
-            'customer_id': customer_id,
-            'category': category,
-            'product': product,
-            'quantity': quantity,
-            'unit_price': price,
-            'total_amount': total if status == 'Complété' else 0,
-            'region': region,
-            'payment_method': payment,
-            'status': status
-        })
+    # Génération des dates (plus de ventes récentes)
+    days_offset = rng.exponential(200, n).astype(int)
+    days_offset = np.where(days_offset > 730, rng.integers(0, 731, n), days_offset)
+    dates = pd.Timestamp(start_date) + pd.to_timedelta(days_offset, unit='D')
+
+    # Catégorie et produit
+    cat_idx = rng.integers(0, len(CATEGORIES), n)
+    categories = np.array(CATEGORIES)[cat_idx]
+    products = np.empty(n, dtype=object)
+    for idx, category in enumerate(CATEGORIES):
+        mask = cat_idx == idx
+        products[mask] = rng.choice(PRODUCTS[category], size=mask.sum())
+
+    # Prix basé sur la catégorie
+    base_price = rng.uniform(PRICE_RANGES[cat_idx, 0], PRICE_RANGES[cat_idx, 1])
+
+    # Quantité (plus souvent 1-2)
+    quantity = rng.choice([1, 2, 3, 4, 5], size=n, p=[0.5, 0.25, 0.15, 0.07, 0.03])
+
+    # Prix total avec petite variation aléatoire
+    price = np.round(base_price * rng.uniform(0.9, 1.1, n), 2)
+    total = np.round(price * quantity, 2)
+
+    # Client ID (environ 1000 clients différents)
+    customer_ids = np.char.add('CUST_', np.char.zfill(rng.integers(1, 1001, n).astype(str), 4))
+
+    # Statut (95% de succès)
+    status = rng.choice(['Complété', 'Annulé', 'Remboursé'], size=n, p=[0.95, 0.03, 0.02])
+
+    data = {
+        'transaction_id': np.char.add('TXN_', np.char.zfill(np.arange(1, n + 1).astype(str), 6)),
+        'date': dates.strftime('%Y-%m-%d'),
+        'customer_id': customer_ids,
+        'category': categories,
+        'product': products,
+        'quantity': quantity.astype('int16'),
+        'unit_price': price.astype('float32'),
+        'total_amount': np.where(status == 'Complété', total, 0),
+        'region': rng.choice(REGIONS, size=n),
+        'payment_method': rng.choice(PAYMENT_METHODS, size=n),
+        'status': status
+    }
 
     df = pd.DataFrame(data)
 
@@ -123,39 +110,26 @@ def generate_customer_data(transactions_df):
     pd.DataFrame
         DataFrame avec les informations clients
     """
-    customers = transactions_df['customer_id'].unique()
-
-    data = []
-    for customer_id in customers:
-        # Première transaction du client
-        first_purchase = transactions_df[transactions_df['customer_id'] == customer_id]['date'].min()
-
-        # Nombre total d'achats
-        total_purchases = len(transactions_df[transactions_df['customer_id'] == customer_id])
-
-        # Montant total dépensé
-        total_spent = transactions_df[
-            (transactions_df['customer_id'] == customer_id) &
-            (transactions_df['status'] == 'Complété')
-        ]['total_amount'].sum()
-
-        # Segment client basé sur le total dépensé
-        if total_spent > 2000:
-            segment = 'Premium'
-        elif total_spent > 500:
-            segment = 'Régulier'
-        else:
-            segment = 'Occasionnel'
-
-        data.append({
-            'customer_id': customer_id,
-            'first_purchase_date': first_purchase,
-            'total_purchases': total_purchases,
-            'total_spent': round(total_spent, 2),
-            'segment': segment
-        })
-
-    return pd.DataFrame(data)
+    # Première transaction et nombre total d'achats (une seule passe groupby)
+    customers = transactions_df.groupby('customer_id', sort=False).agg(
+        first_purchase_date=('date', 'min'),
+        total_purchases=('transaction_id', 'count')
+    )
+
+    # Montant total dépensé (transactions complétées uniquement)
+    completed = transactions_df[transactions_df['status'] == 'Complété']
+    total_spent = completed.groupby('customer_id', sort=False)['total_amount'].sum()
+    customers = customers.join(total_spent.rename('total_spent'), how='left')
+    customers['total_spent'] = customers['total_spent'].fillna(0).round(2)
+
+    # Segment client basé sur le total dépensé
+    customers['segment'] = np.select(
+        [customers['total_spent'] > 2000, customers['total_spent'] > 500],
+        ['Premium', 'Régulier'],
+        default='Occasionnel'
+    )
+
+    return customers.reset_index()
 
 if __name__ == "__main__":
     print("Generation des donnees e-commerce...")
@@ -163,12 +137,16 @@ if __name__ == "__main__":
     # Générer les transactions
     transactions = generate_ecommerce_data(n_transactions=5000)
     transactions.to_csv('data/transactions.csv', index=False, encoding='utf-8')
-    print(f"OK - {len(transactions)} transactions generees -> data/transactions.csv")
+    transactions.astype({'date': 'datetime64[ns]'}).to_parquet(
+        'data/transactions.parquet', compression='zstd', index=False)
+    print(f"OK - {len(transactions)} transactions generees -> data/transactions.csv / .parquet")
 
     # Générer les données clients
     customers = generate_customer_data(transactions)
     customers.to_csv('data/customers.csv', index=False, encoding='utf-8')
-    print(f"OK - {len(customers)} clients generes -> data/customers.csv")
+    customers.astype({'first_purchase_date': 'datetime64[ns]'}).to_parquet(
+        'data/customers.parquet', compression='zstd', index=False)
+    print(f"OK - {len(customers)} clients generes -> data/customers.csv / .parquet")
 
     # Afficher un aperçu
     print("\nApercu des donnees:")